@@ -9,32 +9,48 @@ logger = logging.getLogger(__name__)
 
 _automark = False
 _ignore_unknown = False
+_missing = object()
 
 
 class DependencyItemStatus(object):
     """Status of a test item in a dependency manager.
     """
 
+    __slots__ = ('setup_outcome', 'call_outcome', 'teardown_outcome')
+
     Phases = ('setup', 'call', 'teardown')
 
     def __init__(self):
-        self.results = { w:None for w in self.Phases }
+        self.setup_outcome = None
+        self.call_outcome = None
+        self.teardown_outcome = None
 
     def __str__(self):
-        l = ["%s: %s" % (w, self.results[w]) for w in self.Phases]
+        l = ["%s: %s" % (w, getattr(self, w + '_outcome'))
+             for w in self.Phases]
         return "Status(%s)" % ", ".join(l)
 
     def addResult(self, rep):
-        self.results[rep.when] = rep.outcome
+        if rep.when == 'setup':
+            self.setup_outcome = rep.outcome
+        elif rep.when == 'call':
+            self.call_outcome = rep.outcome
+        elif rep.when == 'teardown':
+            self.teardown_outcome = rep.outcome
 
     def isSuccess(self):
-        return list(self.results.values()) == ['passed', 'passed', 'passed']
+        return (self.setup_outcome == self.call_outcome ==
+                self.teardown_outcome == 'passed')
 
 
 class DependencyManager(object):
     """Dependency manager, stores the results of tests.
     """
 
+    __slots__ = ('results', 'scope')
+
+    Scopes = ('session', 'package', 'module', 'class')
+
     ScopeCls = {
         'session': pytest.Session,
         'package': pytest.Package,
@@ -60,42 +76,63 @@ class DependencyManager(object):
 
     def addResult(self, item, name, rep):
         if not name:
-            # Old versions of pytest used to add an extra "::()" to
-            # the node ids of class methods to denote the class
-            # instance.  This has been removed in pytest 4.0.0.
-            nodeid = item.nodeid.replace("::()::", "::")
-            if self.scope == 'session' or self.scope == 'package':
-                name = nodeid
-            elif self.scope == 'module':
-                name = nodeid.split("::", 1)[1]
-            elif self.scope == 'class':
-                name = nodeid.split("::", 2)[2]
-            else:
-                raise RuntimeError("Internal error: invalid scope '%s'"
-                                   % self.scope)
+            name = _get_dep_name(item, self.scope)
         status = self.results.setdefault(name, DependencyItemStatus())
-        logger.debug("register %s %s %s in %s scope",
-                     rep.when, name, rep.outcome, self.scope)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("register %s %s %s in %s scope",
+                         rep.when, name, rep.outcome, self.scope)
         status.addResult(rep)
 
     def checkDepend(self, depends, item):
-        logger.debug("check dependencies of %s in %s scope ...",
-                     item.name, self.scope)
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("check dependencies of %s in %s scope ...",
+                         item.name, self.scope)
         for i in depends:
-            if i in self.results:
-                if self.results[i].isSuccess():
-                    logger.debug("... %s succeeded", i)
-                    continue
-                else:
-                    logger.debug("... %s has not succeeded", i)
-            else:
-                logger.debug("... %s is unknown", i)
+            status = self.results.get(i, _missing)
+            if status is _missing:
+                if debug:
+                    logger.debug("... %s is unknown", i)
                 if _ignore_unknown:
                     continue
+            elif status.isSuccess():
+                if debug:
+                    logger.debug("... %s succeeded", i)
+                continue
+            elif debug:
+                logger.debug("... %s has not succeeded", i)
             logger.info("skip %s because it depends on %s", item.name, i)
             pytest.skip("%s depends on %s" % (item.name, i))
 
 
+def _get_dep_name(item, scope):
+    """Get the name of item in the given scope.
+
+    The name is derived from the node id on first use and cached on
+    the item.
+    """
+    if not hasattr(item, "_dep_names"):
+        item._dep_names = {}
+    try:
+        return item._dep_names[scope]
+    except KeyError:
+        pass
+    # Old versions of pytest used to add an extra "::()" to
+    # the node ids of class methods to denote the class
+    # instance.  This has been removed in pytest 4.0.0.
+    nodeid = item.nodeid.replace("::()::", "::")
+    if scope == 'session' or scope == 'package':
+        name = nodeid
+    elif scope == 'module':
+        name = nodeid.split("::", 1)[1]
+    elif scope == 'class':
+        name = nodeid.split("::", 2)[2]
+    else:
+        raise RuntimeError("Internal error: invalid scope '%s'" % scope)
+    item._dep_names[scope] = name
+    return name
+
+
 def depends(request, other, scope='module'):
     """Add dependency on other test.
 
@@ -144,26 +181,50 @@ def pytest_configure(config):
                             "other tests or to depend on other tests.")
 
 
+def _get_dep_marker(item, refresh=False):
+    """Get the "dependency" marker of item.
+
+    The marker is looked up on first use and cached on the item.  With
+    refresh set, it is looked up again, to take markers into account
+    that have been added at runtime, e.g. by a fixture.
+    """
+    if refresh or not hasattr(item, "_dependency_marker"):
+        item._dependency_marker = item.get_closest_marker("dependency")
+    return item._dependency_marker
+
+
+def _get_dep_managers(item):
+    """Get the dependency managers of item for all scopes.
+
+    The managers are looked up on first use and cached on the item.
+    """
+    if not hasattr(item, "_dep_managers"):
+        managers = (DependencyManager.getManager(item, scope=scope)
+                    for scope in DependencyManager.Scopes)
+        item._dep_managers = tuple(m for m in managers if m)
+    return item._dep_managers
+
+
 @pytest.hookimpl(tryfirst=True, hookwrapper=True)
 def pytest_runtest_makereport(item, call):
     """Store the test outcome if this item is marked "dependency".
     """
     outcome = yield
-    marker = item.get_closest_marker("dependency")
+    # Fixtures may add the marker during setup, so look it up again
+    # for the setup report.
+    marker = _get_dep_marker(item, refresh=(call.when == 'setup'))
     if marker is not None or _automark:
         rep = outcome.get_result()
         name = marker.kwargs.get('name') if marker is not None else None
-        for scope in DependencyManager.ScopeCls:
-            manager = DependencyManager.getManager(item, scope=scope)
-            if (manager):
-                manager.addResult(item, name, rep)
+        for manager in _get_dep_managers(item):
+            manager.addResult(item, name, rep)
 
 
 def pytest_runtest_setup(item):
     """Check dependencies if this item is marked "dependency".
     Skip if any of the dependencies has not been run successfully.
     """
-    marker = item.get_closest_marker("dependency")
+    marker = _get_dep_marker(item, refresh=True)
     if marker is not None:
         depends = marker.kwargs.get('depends')
         if depends:
@@ -25,3 +25,129 @@ def test_marker(ctestdir):
     """)
     result = ctestdir.runpytest("--verbose")
     result.assert_outcomes(passed=1)
+
+
+def test_marker_modifyitems(ctestdir):
+    """The marker may also be added in pytest_collection_modifyitems()
+    by another plugin or in conftest.py.
+    """
+    ctestdir.makeconftest("""
+        import sys
+        import pytest
+        if "pytest_dependency" not in sys.modules:
+            pytest_plugins = "pytest_dependency"
+
+        def pytest_collection_modifyitems(items):
+            for item in items:
+                if item.name == "test_b":
+                    item.add_marker(pytest.mark.dependency(depends=["test_a"]))
+                else:
+                    item.add_marker(pytest.mark.dependency())
+    """)
+    ctestdir.makepyfile("""
+        import pytest
+
+        def test_a():
+            assert False
+
+        def test_b():
+            pass
+    """)
+    result = ctestdir.runpytest("--verbose")
+    result.assert_outcomes(passed=0, skipped=1, failed=1)
+    result.stdout.re_match_lines(r"""
+        .*::test_a FAILED
+        .*::test_b SKIPPED(?:\s+\(.*\))?
+    """)
+
+
+def test_marker_fixture(ctestdir):
+    """The marker may also be applied at runtime from a fixture.
+    """
+    ctestdir.makepyfile("""
+        import pytest
+
+        @pytest.fixture
+        def mark_a(request):
+            request.applymarker(pytest.mark.dependency(name="a"))
+
+        def test_a(mark_a):
+            pass
+
+        @pytest.mark.dependency(depends=["a"])
+        def test_b():
+            pass
+    """)
+    result = ctestdir.runpytest("--verbose")
+    result.assert_outcomes(passed=2, skipped=0, failed=0)
+    result.stdout.re_match_lines(r"""
+        .*::test_a PASSED
+        .*::test_b PASSED
+    """)
+
+
+def test_marker_modifyitems_late(ctestdir):
+    """The marker may even be added after the plugin's own
+    pytest_collection_modifyitems() did run.
+    """
+    ctestdir.makeconftest("""
+        import sys
+        import pytest
+        if "pytest_dependency" not in sys.modules:
+            pytest_plugins = "pytest_dependency"
+
+        @pytest.hookimpl(hookwrapper=True)
+        def pytest_collection_modifyitems(items):
+            yield
+            for item in items:
+                if item.name == "test_b":
+                    item.add_marker(pytest.mark.dependency(depends=["test_a"]))
+                else:
+                    item.add_marker(pytest.mark.dependency())
+    """)
+    ctestdir.makepyfile("""
+        import pytest
+
+        def test_a():
+            assert False
+
+        def test_b():
+            pass
+    """)
+    result = ctestdir.runpytest("--verbose")
+    result.assert_outcomes(passed=0, skipped=1, failed=1)
+    result.stdout.re_match_lines(r"""
+        .*::test_a FAILED
+        .*::test_b SKIPPED(?:\s+\(.*\))?
+    """)
+
+
+def test_manager_addresult(ctestdir):
+    """DependencyManager.addResult() may also be called directly for
+    an item that is not marked.
+    """
+    ctestdir.makepyfile("""
+        import pytest
+        from pytest_dependency import DependencyManager
+
+        class Report:
+            when = 'call'
+            outcome = 'passed'
+
+        class TestClass:
+            def test_name(self, request):
+                names = {}
+                for scope in ('session', 'package', 'module', 'class'):
+                    manager = DependencyManager(scope)
+                    manager.addResult(request.node, None, Report())
+                    names[scope] = list(manager.results)
+                nodeid = "test_manager_addresult.py::TestClass::test_name"
+                assert names == {
+                    'session': [nodeid],
+                    'package': [nodeid],
+                    'module': ["TestClass::test_name"],
+                    'class': ["test_name"],
+                }
+    """)
+    result = ctestdir.runpytest("--verbose")
+    result.assert_outcomes(passed=1)